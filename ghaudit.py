@@ -1,45 +1,46 @@
 """ghaudit.py
 Tools used for ad-hoc audit of GitHub accounts for Microsoft users.
 """
+import collections
 import configparser
+import contextlib
+import csv
+import functools
 import gzip
-import json
+import io
 import os
+import pickle
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from orjson import loads as json_loads # faster parsing, if available
+except ImportError:
+    from json import loads as json_loads
 
 import gitdata as gd
 
+FETCH_WORKERS = 8 # number of concurrent GitHub API calls in bulk operations
+
 def appendcollabs_org(filename, org=None): #---------------------------------<<<
     """Append collaborator info for an org to collabs.csv data file.
 
     Special case: if no org provided, initialize the data file.
     """
     if not org:
-        open(filename, 'w').write('org,repo,collaborator\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['org', 'repo', 'collaborator'])
         return
 
-    headers_dict = {"Accept": "application/vnd.github.korra-preview"}
-    endpoint = '/orgs/' + org + '/outside_collaborators?per_page=100'
-    collabdata = gdwrapper(endpoint=endpoint, \
-        filename=None, entity='collab', authuser='msftgits', \
-        fields=['*'], headers=headers_dict)
-    for collab in collabdata:
-        line = org + ',,' + collab['login']
-        open(filename, 'a').write(line + '\n')
+    appendrows(filename, collabrows_org(org))
 
 def appendcollabs_repo(filename, org, repo): #-------------------------------<<<
     """Append collaborator info for an org/repo to collabs.csv data file.
 
     Org/repo required - assumes data file already initialized by appendcollab_org().
     """
-    headers_dict = {"Accept": "application/vnd.github.korra-preview"}
-    endpoint = '/repos/' + org + '/' + repo + '/collaborators?per_page=100&affiliation=outside'
-    collabdata = gdwrapper(endpoint=endpoint, \
-        filename=None, entity='collab', authuser='msftgits', \
-        fields=['login', 'repo', 'id'], headers=headers_dict)
-    for collab in collabdata:
-        line = org + ',' + repo + ',' + collab['login']
-        open(filename, 'a').write(line + '\n')
+    appendrows(filename, collabrows_repo(org, repo))
 
 def appendorgmembers(filename, org=None): #----------------------------------<<<
 
@@ -48,18 +49,14 @@ def appendorgmembers(filename, org=None): #----------------------------------<<<
     Special case: if no org provided, initialize the data file.
     """
     if not org:
-        open(filename, 'w').write('org,login,type,site_admin,linked\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['org', 'login', 'type', 'site_admin', 'linked'])
         return
 
-    memberdata = gdwrapper(endpoint='/orgs/' + org + '/members?per_page=100', filename=None, \
-        entity='member', authuser='msftgits', \
-        fields=['login', 'type', 'site_admin'], headers={})
-    for member in memberdata:
-        site_admin = 'True' if member['site_admin'] else 'False'
-        linked = 'True' if islinked(member['login']) else 'False'
-        open(filename, 'a').write(org + ',' + member['login'] + ',' + \
-            member['type'] + ',' + site_admin + ',' + \
-            linked + '\n')
+    if not hasattr(gd._settings, 'linked'):
+        loadlinkdata()
+    appendrows(filename, orgmemberrows(org))
 
 def appendrepos(filename, org=None): #---------------------------------------<<<
     """Append repo info for an org to repos.csv data file.
@@ -67,15 +64,12 @@ def appendrepos(filename, org=None): #---------------------------------------<<<
     Special case: if no org provided, initialize the data file.
     """
     if not org:
-        open(filename, 'w').write('org,repo,private,fork\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['org', 'repo', 'private', 'fork'])
         return
 
-    repodata = gdwrapper(endpoint='/orgs/' + org + '/repos', filename=None, \
-        entity='repo', authuser='msftgits', \
-        fields=['name', 'owner.login', 'private', 'fork'], headers={})
-    for repo in repodata:
-        open(filename, 'a').write(org + ',' + repo['name'] + ',' + \
-            repo['private'] + ',' + str(repo['fork']) + '\n')
+    appendrows(filename, reporows(org))
 
 def appendrepoteams(filename, teamid=None): #--------------------------------<<<
     """Append teamp-repo info for a teamp to repoteams.csv data file.
@@ -83,19 +77,22 @@ def appendrepoteams(filename, teamid=None): #--------------------------------<<<
     Special case: if no teamid provided, initialize the data file.
     """
     if not teamid:
-        open(filename, 'w').write('org,repo,teamid,admin,push,pull\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['org', 'repo', 'teamid', 'admin', 'push', 'pull'])
         return
 
-    repodata = gdwrapper(endpoint='/teams/' + teamid + '/repos?per_page=100',\
-        filename=None, entity='repo', authuser='msftgits', \
-        fields=['full_name','permissions.admin','permissions.push','permissions.pull'], \
-        headers={})
-    for repo in repodata:
-        orgname, reponame = repo['full_name'].split('/')
-        open(filename, 'a').write(orgname + ',' + reponame + ',' + teamid + ',' + \
-            str(repo['permissions_admin']) + ',' + \
-            str(repo['permissions_push']) + ',' + \
-            str(repo['permissions_pull']) + '\n')
+    appendrows(filename, repoteamrows(teamid))
+
+def appendrows(filename, rows): #--------------------------------------------<<<
+    """Append rows to a CSV data file.
+
+    filename = data file, already initialized by one of the append*() functions
+    rows = iterable of rows (each a list of values) as returned by the *rows()
+           functions; rows are written as they're produced
+    """
+    with open(filename, 'a', buffering=65536, newline='') as fhandle:
+        csv.writer(fhandle, lineterminator='\n').writerows(rows)
 
 def appendteammembers(filename, team=None): #--------------------------------<<<
     """Append member info for a team to teammembers.csv data file.
@@ -103,18 +100,14 @@ def appendteammembers(filename, team=None): #--------------------------------<<<
     Special case: if no team provided, initialize the data file.
     """
     if not team:
-        open(filename, 'w').write('teamid,login,type,site_admin,linked\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['teamid', 'login', 'type', 'site_admin', 'linked'])
         return
 
-    memberdata = gdwrapper(endpoint='/teams/' + team + '/members?per_page=100', \
-        filename=None, entity='teammember', authuser='msftgits', \
-        fields=['login', 'type', 'site_admin'], headers={})
-    for member in memberdata:
-        site_admin = 'True' if member['site_admin'] else 'False'
-        linked = 'True' if islinked(member['login']) else 'False'
-        open(filename, 'a').write(team + ',' + member['login'] + ',' + \
-            member['type'] + ',' + site_admin + ',' + \
-            linked + '\n')
+    if not hasattr(gd._settings, 'linked'):
+        loadlinkdata()
+    appendrows(filename, teammemberrows(team))
 
 def appendteams(filename, org=None): #---------------------------------------<<<
     """Append team info for an org to teams.csv data file.
@@ -122,16 +115,12 @@ def appendteams(filename, org=None): #---------------------------------------<<<
     Special case: if no org provided, initialize the data file.
     """
     if not org:
-        open(filename, 'w').write('org,name,id,privacy,permission\n')
+        with open(filename, 'w', newline='') as fhandle:
+            csv.writer(fhandle, lineterminator='\n').writerow(
+                ['org', 'name', 'id', 'privacy', 'permission'])
         return
 
-    teamdata = gdwrapper(endpoint='/orgs/' + org + '/teams', filename=None, \
-        entity='team', authuser='msftgits', \
-        fields=['name', 'id', 'privacy', 'permission'], headers={})
-    for team in teamdata:
-        open(filename, 'a').write(org + ',' + team['name'] + ',' + \
-            str(team['id']) + ',' + team['privacy'] + ',' + \
-            team['permission'] + '\n')
+    appendrows(filename, teamrows(org))
 
 def audituser(username): #---------------------------------------------------<<<
     """Show which repos/orgs/teams a GitHub user is associated with.
@@ -146,17 +135,16 @@ def audituser(username): #---------------------------------------------------<<<
         print(org)
 
     print('TEAM memberships:'.ljust(80, '-'))
-    lastline = '*none*' # used to avoid re-printing of an org after first time
+    lastorg = None # used to avoid re-printing of an org after first time
     for teamid in teammemberships(username):
-        thisline = teamdesc(teamid)
-        if thisline.split('/')[0][26:] == lastline.split('/')[0][26:]:
+        thisline, orgname, teamname = teaminfo(teamid)
+        if orgname is not None and orgname == lastorg:
             # repetition of same org, so remove org from printed line
             permpriv = thisline[:26]
-            reponame = thisline.split('/')[1]
-            print(permpriv.ljust(len(thisline) - len(reponame) - 1) + '/' + reponame, end='')
+            print(permpriv + ' ' * len(orgname) + '/' + teamname, end='')
         else:
             print(thisline, end='')
-        lastline = thisline
+        lastorg = orgname
         repolist = teamrepos(teamid)
         print(' (' + str(len(repolist)) + ' repos)')
 
@@ -169,12 +157,45 @@ def audituser(username): #---------------------------------------------------<<<
 
     #/// for each repo: last update, readme, contributing, license, code of conduct
 
+def auditusers(usernames): #-------------------------------------------------<<<
+    """Show audit information for each of a list of GitHub users.
+
+    The data files are each read once (on the first lookup) and indexed by
+    username, so auditing M users doesn't rescan the files M times.
+    """
+    for username in usernames:
+        audituser(username)
+
 def authenticate(): #--------------------------------------------------------<<<
     """Set up gitdata authentication.
     Currently using msftgits for all auditing of Microsoft accounts.
     """
     gd.auth_config({'username': 'msftgits'})
 
+@functools.lru_cache(maxsize=1)
+def azure_blobservice(): #---------------------------------------------------<<<
+    """Get the Azure blob service used for Microsoft linking data.
+
+    The service object is created on first call and reused for the rest of
+    the session.
+    """
+    from azure.storage.blob import BlockBlobService
+    return BlockBlobService(account_name=azure_setting('linkingdata', 'account'),
+                            account_key=azure_setting('linkingdata', 'key'))
+
+@functools.lru_cache(maxsize=1)
+def azure_config(): #--------------------------------------------------------<<<
+    """Get the parsed private INI data for Azure settings.
+
+    The INI file is only read once per session; subsequent calls return the
+    same ConfigParser object.
+    """
+    source_folder = os.path.dirname(os.path.realpath(__file__))
+    datafile = os.path.join(source_folder, '../_private/azure.ini')
+    config = configparser.ConfigParser()
+    config.read(datafile)
+    return config
+
 def azure_setting(section, setting): #---------------------------------------<<<
     """Get Azure setting from private INI data.
 
@@ -183,15 +204,27 @@ def azure_setting(section, setting): #---------------------------------------<<<
 
     Returns the setting's value, or None if not found.
     """
-    source_folder = os.path.dirname(os.path.realpath(__file__))
-    datafile = os.path.join(source_folder, '../_private/azure.ini')
-    config = configparser.ConfigParser()
-    config.read(datafile)
-    try:
-        retval = config.get(section, setting)
-    except configparser.NoSectionError:
-        retval = None
-    return retval
+    return azure_config().get(section, setting, fallback=None)
+
+def boundedmap(executor, function, *iterables): #----------------------------<<<
+    """Like executor.map(), but with no more than 2 * FETCH_WORKERS calls
+    submitted ahead of the results that have been consumed.
+
+    executor  = a ThreadPoolExecutor
+    function  = function to be called for each set of arguments
+    iterables = iterables of arguments, as for map()
+
+    Yields the function's return values, in the same order as the arguments.
+    Unlike executor.map(), the calls aren't all submitted at once, so results
+    that are ready but not yet consumed can't accumulate in memory.
+    """
+    pending = collections.deque()
+    for args in zip(*iterables):
+        pending.append(executor.submit(function, *args))
+        if len(pending) == 2 * FETCH_WORKERS:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
 
 def collabapis(orgname, filename=None): #------------------------------------<<<
     """Testing/comparison of the repo-level and org-level collaborator APIs.
@@ -202,20 +235,18 @@ def collabapis(orgname, filename=None): #------------------------------------<<<
     # REPO-level collaborators ...
     repodata = gdwrapper(endpoint='/orgs/' + orgname + '/repos?per_page=100', filename=None, \
         entity='repo', authuser='msftgits', \
-        fields=['name', 'owner.login', 'private', 'fork'], headers={})
-    for repo in repodata:
-        if repo['private'] == 'private':
-            continue # skip private repos
-        reponame = repo['name']
-        endpoint = '/repos/' + orgname + '/' + reponame + '/collaborators?per_page=100'
-        collabdata = gdwrapper(endpoint=endpoint, \
-            filename=None, entity='collab', authuser='msftgits', \
-            fields=['login', 'repo', 'id'], headers={})
-        for collab in collabdata:
-            line = orgname + ',' + reponame + ',' + collab['login']
-            print(line)
-            if filename:
-                open(filename, 'a').write(line + '\n')
+        fields=['name', 'owner.login', 'private', 'fork'], headers={}, sort=False)
+    reponames = [repo['name'] for repo in repodata
+                 if repo['private'] != 'private'] # skip private repos
+    repocollabs = []
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        for rows in executor.map(
+                functools.partial(collabrows_repo, orgname, outside=False),
+                reponames):
+            repocollabs.extend(rows)
+
+    # sort once for all repos (by repo, then collaborator)
+    repocollabs.sort(key=lambda collab: (collab[1].lower(), collab[2].lower()))
 
     # ORG-level collaborators ...
     headers_dict = {"Accept": "application/vnd.github.korra-preview"}
@@ -223,45 +254,92 @@ def collabapis(orgname, filename=None): #------------------------------------<<<
     collabdata = gdwrapper(endpoint=endpoint, \
         filename=None, entity='collab', authuser='msftgits', \
         fields=['*'], headers=headers_dict)
-    for collab in collabdata:
-        line = orgname + ',,' + collab['login']
-        print(line)
-        if filename:
-            open(filename, 'a').write(line + '\n')
+    orgcollabs = [(orgname, '', collab['login']) for collab in collabdata]
+
+    for collab in repocollabs + orgcollabs:
+        print(','.join(collab))
+    if filename:
+        with open(filename, 'a', buffering=65536, newline='') as fhandle:
+            writer = csv.writer(fhandle, lineterminator='\n')
+            writer.writerows(repocollabs)
+            writer.writerows(orgcollabs)
 
 def collaborations(username): #----------------------------------------------<<<
     """Return list of orgs and/or repos that user has a collaborator
     relationship with.
     """
-    collabs = []
-    firstline = True
-    for line in open('ghaudit/collabs.csv', 'r').readlines():
-        if firstline:
-            firstline = False
-            continue
-        org = line.split(',')[0]
-        repo = line.split(',')[1]
-        user = line.split(',')[2].strip()
-        if username.lower() == user.lower():
-            if repo:
-                collabs.append(org + '/' + repo)
-            else:
-                collabs.append(org)
-    return sorted(collabs)
+    if not hasattr(gd._settings, 'collabindex'):
+        # index by lower-cased username, in one pass over the file
+        gd._settings.collabindex = dict()
+        with open('ghaudit/collabs.csv', 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for org, repo, user, *_ in csvreader:
+                gd._settings.collabindex.setdefault(user.lower(), []).append(
+                    org + '/' + repo if repo else org)
+
+    return sorted(gd._settings.collabindex.get(username.lower(), []))
+
+def collabrows_org(org): #---------------------------------------------------<<<
+    """Get collabs.csv rows for the outside collaborators of an org.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list.
+    """
+    headers_dict = {"Accept": "application/vnd.github.korra-preview"}
+    endpoint = '/orgs/' + org + '/outside_collaborators?per_page=100'
+    collabdata = gdwrapper(endpoint=endpoint, \
+        filename=None, entity='collab', authuser='msftgits', \
+        fields=['*'], headers=headers_dict, sort=False)
+    return ([org, '', collab['login']] for collab in collabdata)
+
+def collabrows_repo(org, repo, outside=True): #------------------------------<<<
+    """Get collabs.csv rows for the outside collaborators of an org/repo.
+
+    outside = whether to only include outside collaborators; if False, all
+              collaborators are included
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list.
+    """
+    if outside:
+        headers_dict = {"Accept": "application/vnd.github.korra-preview"}
+        endpoint = '/repos/' + org + '/' + repo + '/collaborators?per_page=100&affiliation=outside'
+    else:
+        headers_dict = {}
+        endpoint = '/repos/' + org + '/' + repo + '/collaborators?per_page=100'
+    collabdata = gdwrapper(endpoint=endpoint, \
+        filename=None, entity='collab', authuser='msftgits', \
+        fields=['login', 'repo', 'id'], headers=headers_dict, sort=False)
+    return ([org, repo, collab['login']] for collab in collabdata)
 
 def gdwrapper(*, endpoint, filename, entity, authuser, #---------------------<<<
-              fields, headers, verbose=True):
+              fields, headers, verbose=True, display=False, sort=True):
     """gitdata wrapper for automating gitdata calls
+
+    display = whether to display the retrieved data on the console
+    sort    = whether to sort the returned data; callers that don't depend on
+              the order (such as the *rows() functions) pass sort=False
     """
-    gd._settings.display_data = False
-    gd._settings.verbose = False
-    gd._settings.datasource = 'a'
-    gd.auth_config({'username': authuser})
+    if getattr(gd._settings, 'gdwrapper_user', None) != authuser:
+        # configure gitdata on first call (or if authuser changes)
+        gd._settings.display_data = False
+        gd._settings.verbose = False
+        gd._settings.datasource = 'a'
+        gd._settings.etag_cache = 'ghaudit/.cache' # reuse unchanged pages
+        # bulk operations already run FETCH_WORKERS calls at a time, so each
+        # one's page requests are limited to keep the total within the pool
+        gd._settings.page_workers = max(gd._settings.pool_size // FETCH_WORKERS, 1)
+        gd.auth_config({'username': authuser})
+        gd._settings.gdwrapper_user = authuser
     templist = gd.github_data(
         endpoint=endpoint, entity=entity, fields=fields,
         constants={"user": authuser}, headers=headers)
-    sorted_data = sorted(templist, key=gd.data_sort)
-    gd.data_display(sorted_data)
+    sorted_data = sorted(templist, key=gd.data_sort) if sort else templist
+    if display:
+        gd._settings.display_data = True
+        gd.data_display(sorted_data)
+        gd._settings.display_data = False
     gd.data_write(filename, sorted_data)
 
     if verbose:
@@ -277,140 +355,240 @@ def islinked(username): #----------------------------------------------------<<<
     """Returns True if passed GitHub username is a linked Microsoft account.
     """
     if not hasattr(gd._settings, 'linked'):
-        gd._settings.linked = []
-        firstline = True
-        for line in open('ghaudit/linkdata.csv', 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            gd._settings.linked.append(line.split(',')[0].lower())
+        loadlinkdata()
 
     return (username.lower() in gd._settings.linked)
 
 def latestlinkdata(): #------------------------------------------------------<<<
     """Returns the most recent filename for Azure blobs that contain linkdata.
+
+    If a prefix setting exists in the linkingdata section of azure.ini, only
+    blobs whose names start with that prefix are listed by Azure.
     """
-    azure_acct = azure_setting('linkingdata', 'account')
-    azure_key = azure_setting('linkingdata', 'key')
     azure_container = azure_setting('linkingdata', 'container')
-
-    from azure.storage.blob import BlockBlobService
-    block_blob_service = BlockBlobService(account_name=azure_acct, account_key=azure_key)
-    blobs = block_blob_service.list_blobs(azure_container)
-    latest = ''
-    for blob in blobs:
-        latest = blob.name if blob.name > latest else latest
-    return latest if latest else None
+    blobs = azure_blobservice().list_blobs(
+        azure_container, prefix=azure_setting('linkingdata', 'prefix'))
+    return max((blob.name for blob in blobs), default=None) or None
 
 def linkedemail(username): #-------------------------------------------------<<<
     """Returned linked email address (if any) for specified GitHub username.
     """
     if not hasattr(gd._settings, 'linkedemail'):
-        gd._settings.linkedemail = dict()
-        firstline = True
-        for line in open('ghaudit/linkdata.csv', 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            gd._settings.linkedemail[line.split(',')[0].lower()] = line.split(',')[1].strip()
+        loadlinkdata()
 
     return gd._settings.linkedemail.get(username.lower(), None)
 
+def loadlinkdata(): #--------------------------------------------------------<<<
+    """Load linking data into gd._settings.linkedemail (dictionary of
+    lower-cased GitHub username -> email) and gd._settings.linked (the keys
+    of that dictionary, used for membership tests without a separate copy of
+    the usernames).
+
+    Uses ghaudit/linkdata.pkl if it's at least as new as linkdata.csv (or
+    there's no linkdata.csv), otherwise parses linkdata.csv. The CSV file is
+    also parsed if the pickle file can't be loaded.
+    """
+    csvfile = 'ghaudit/linkdata.csv'
+    pklfile = 'ghaudit/linkdata.pkl'
+    emails = None
+    if os.path.isfile(pklfile) and (not os.path.isfile(csvfile) or
+                                    os.path.getmtime(pklfile) >= os.path.getmtime(csvfile)):
+        try:
+            with open(pklfile, 'rb') as fhandle:
+                emails = pickle.load(fhandle)
+        except (EOFError, pickle.UnpicklingError):
+            emails = None # damaged pickle file, so parse the CSV file instead
+    if emails is None:
+        emails = dict()
+        with open(csvfile, 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for githubuser, email, *_ in csvreader:
+                # usernames are lower-cased once here, at load time
+                emails[githubuser.lower()] = email.strip()
+
+    gd._settings.linkedemail = emails
+    gd._settings.linked = emails.keys()
+
+def orgmemberrows(org): #----------------------------------------------------<<<
+    """Get orgmembers.csv rows for the members of an org.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list. The caller must have loaded
+    the linking data (loadlinkdata()), because this may run in worker threads.
+    """
+    memberdata = gdwrapper(endpoint='/orgs/' + org + '/members?per_page=100', filename=None, \
+        entity='member', authuser='msftgits', \
+        fields=['login', 'type', 'site_admin'], headers={}, sort=False)
+    linked = gd._settings.linked
+    return ([org, member['login'], member['type'],
+             str(bool(member['site_admin'])),
+             str(member['login'].lower() in linked)]
+            for member in memberdata)
+
 def orgmemberships(username): #----------------------------------------------<<<
     """Return list of orgs that user is member of.
     """
-    orgs = []
-    firstline = True
-    for line in open('ghaudit/orgmembers.csv', 'r').readlines():
-        if firstline:
-            firstline = False
-            continue
-        orgname = line.split(',')[0]
-        user = line.split(',')[1]
-        if username.lower() == user.lower():
-            orgs.append(orgname)
-    return orgs
+    if not hasattr(gd._settings, 'orgmemberindex'):
+        # index by lower-cased username, in one pass over the file
+        gd._settings.orgmemberindex = dict()
+        with open('ghaudit/orgmembers.csv', 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for orgname, user, *_ in csvreader:
+                gd._settings.orgmemberindex.setdefault(user.lower(), []).append(orgname)
+
+    return gd._settings.orgmemberindex.get(username.lower(), [])
 
 def printhdr(acct, msg): #---------------------------------------------------<<<
     """Print a header for a section of the audit report.
     """
     ndashes = 65 - len(msg)
-    print('>> ' + msg + ' <<' + ndashes*'-' + ' account: ' + acct.upper())
+    print('>> {0} <<{1} account: {2}'.format(msg, ndashes*'-', acct.upper()))
+
+def reporows(org): #---------------------------------------------------------<<<
+    """Get repos.csv rows for the repos of an org.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list.
+    """
+    repodata = gdwrapper(endpoint='/orgs/' + org + '/repos?per_page=100', filename=None, \
+        entity='repo', authuser='msftgits', \
+        fields=['name', 'owner.login', 'private', 'fork'], headers={}, sort=False)
+    return ([org, repo['name'], repo['private'], str(repo['fork'])]
+            for repo in repodata)
+
+def repoteamrows(teamid): #--------------------------------------------------<<<
+    """Get repoteams.csv rows for the repos a team has rights to.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list.
+    """
+    repodata = gdwrapper(endpoint='/teams/' + teamid + '/repos?per_page=100',\
+        filename=None, entity='repo', authuser='msftgits', \
+        fields=['full_name','permissions.admin','permissions.push','permissions.pull'], \
+        headers={}, sort=False)
+    return (repo['full_name'].split('/') + \
+            [teamid, str(repo['permissions_admin']),
+             str(repo['permissions_push']), str(repo['permissions_pull'])]
+            for repo in repodata)
 
 def teamdesc(teamid): #------------------------------------------------------<<<
     """Return a 1-liner description for specified team id.
     """
+    return teaminfo(teamid)[0]
+
+def teaminfo(teamid): #------------------------------------------------------<<<
+    """Return a (description, org, team name) tuple for specified team id.
+
+    The description is the 1-liner returned by teamdesc(). For an unknown team
+    id, org is None.
+    """
     if not hasattr(gd._settings, 'teamdescription'):
         gd._settings.teamdescription = dict()
-        firstline = True
-        for line in open('ghaudit/teams.csv', 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            orgname = line.split(',')[0]
-            teamname = line.split(',')[1]
-            teamno = line.split(',')[2]
-            privacy = line.split(',')[3]
-            perms = line.split(',')[4].strip()
-            gd._settings.teamdescription[teamno] = 'perm=' + perms.ljust(6) + \
-                'privacy=' + privacy.ljust(7) + orgname + '/' + teamname
-
-    return gd._settings.teamdescription.get(teamid, teamid + ' (unknown team id)')
+        with open('ghaudit/teams.csv', 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for orgname, teamname, teamno, privacy, perms, *_ in csvreader:
+                gd._settings.teamdescription[teamno] = \
+                    ('perm=' + perms.ljust(6) + 'privacy=' + privacy.ljust(7) + \
+                     orgname + '/' + teamname, orgname, teamname)
+
+    return gd._settings.teamdescription.get(
+        teamid, (teamid + ' (unknown team id)', None, teamid))
+
+def teammemberrows(team): #--------------------------------------------------<<<
+    """Get teammembers.csv rows for the members of a team.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list. The caller must have loaded
+    the linking data (loadlinkdata()), because this may run in worker threads.
+    """
+    memberdata = gdwrapper(endpoint='/teams/' + team + '/members?per_page=100', \
+        filename=None, entity='teammember', authuser='msftgits', \
+        fields=['login', 'type', 'site_admin'], headers={}, sort=False)
+    linked = gd._settings.linked
+    return ([team, member['login'], member['type'],
+             str(bool(member['site_admin'])),
+             str(member['login'].lower() in linked)]
+            for member in memberdata)
 
 def teammemberships(username): #---------------------------------------------<<<
     """Return list of teams that user is member of.
     """
-    teams = []
-    firstline = True
-    for line in open('ghaudit/teammembers.csv', 'r').readlines():
-        if firstline:
-            firstline = False
-            continue
-        teamid = line.split(',')[0]
-        user = line.split(',')[1]
-        if username.lower() == user.lower():
-            teams.append(teamid)
-    return teams
+    if not hasattr(gd._settings, 'teammemberindex'):
+        # index by lower-cased username, in one pass over the file
+        gd._settings.teammemberindex = dict()
+        with open('ghaudit/teammembers.csv', 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for teamid, user, *_ in csvreader:
+                gd._settings.teammemberindex.setdefault(user.lower(), []).append(teamid)
+
+    return gd._settings.teammemberindex.get(username.lower(), [])
 
 def teamrepos(teamid): #-----------------------------------------------------<<<
     """Return list of repos that this team has rights to.
     """
-    repos = []
-    firstline = True
-    for line in open('ghaudit/repoteams.csv', 'r').readlines():
-        if firstline:
-            firstline = False
-            continue
-        this_id = line.split(',')[2]
-        if this_id == teamid:
-            reponame = line.split(',')[1]
-            repos.append(reponame)
-    return repos
+    if not hasattr(gd._settings, 'teamrepoindex'):
+        # index by team id, in one pass over the file
+        gd._settings.teamrepoindex = dict()
+        with open('ghaudit/repoteams.csv', 'r', buffering=1<<20, newline='') as fhandle:
+            csvreader = csv.reader(fhandle)
+            next(csvreader, None) # skip header row
+            for _, reponame, this_id, *_ in csvreader:
+                gd._settings.teamrepoindex.setdefault(this_id, []).append(reponame)
+
+    return gd._settings.teamrepoindex.get(teamid, [])
+
+def teamrows(org): #---------------------------------------------------------<<<
+    """Get teams.csv rows for the teams of an org.
+
+    The API call is made immediately. Returns an iterator over the rows, so
+    they can be written without building a list.
+    """
+    teamdata = gdwrapper(endpoint='/orgs/' + org + '/teams?per_page=100', filename=None, \
+        entity='team', authuser='msftgits', \
+        fields=['name', 'id', 'privacy', 'permission'], headers={}, sort=False)
+    return ([org, team['name'], str(team['id']), team['privacy'], team['permission']]
+            for team in teamdata)
 
 def updatelinkdata(): #------------------------------------------------------<<<
     """Retrieve the latest Microsoft linking data from Azure blob storage
     and store in the ghaudit folder.
     """
-    azure_acct = azure_setting('linkingdata', 'account')
-    azure_key = azure_setting('linkingdata', 'key')
     azure_container = azure_setting('linkingdata', 'container')
     azure_blobname = latestlinkdata()
-    gzfile = 'ghaudit/' + azure_blobname
     print('retrieving link data: ' + azure_blobname)
 
-    # download the Azure blob
-    from azure.storage.blob import BlockBlobService
-    block_blob_service = BlockBlobService(account_name=azure_acct, account_key=azure_key)
-    block_blob_service.get_blob_to_path(azure_container, azure_blobname, gzfile)
+    # download the Azure blob into memory; it's decompressed from there, so
+    # the .gz file is never written to disk
+    blobstream = io.BytesIO()
+    azure_blobservice().get_blob_to_stream(azure_container, azure_blobname, blobstream)
+    blobstream.seek(0)
 
-    # decompress the JSON file and write to linkdata.csv
+    # decompress the JSON data and write to linkdata.csv
     outfile = 'ghaudit/linkdata.csv'
-    with open(outfile, 'w') as fhandle:
-        fhandle.write('githubuser,email\n')
-        for line in gzip.open(gzfile).readlines():
-            jsondata = json.loads(line.decode('utf-8'))
-            outline = jsondata['ghu'] + ',' + jsondata['aadupn']
-            fhandle.write(outline + '\n')
+    # (lines are parsed as UTF-8 bytes, without decoding to str first)
+    with gzip.GzipFile(fileobj=blobstream) as gzhandle, \
+        open(outfile, 'w', buffering=1<<20, newline='') as fhandle:
+        writer = csv.writer(fhandle, lineterminator='\n')
+        writer.writerow(['githubuser', 'email'])
+        emails = dict()
+        for line in gzhandle:
+            jsondata = json_loads(line)
+            writer.writerow((jsondata['ghu'], jsondata['aadupn']))
+            emails[jsondata['ghu'].lower()] = jsondata['aadupn'].strip()
+
+    # save the parsed data, so that loadlinkdata() doesn't need to parse the CSV
+    gd._settings.linkedemail = emails
+    gd._settings.linked = emails.keys()
+    # (written to a temporary file that then replaces linkdata.pkl, so that an
+    # interrupted run can't leave a partial pickle file behind)
+    pklfile = 'ghaudit/linkdata.pkl'
+    with open(pklfile + '.tmp', 'wb') as fhandle:
+        pickle.dump(emails, fhandle, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(pklfile + '.tmp', pklfile)
 
 def updatemsdata(): #--------------------------------------------------------<<<
     """Retrieve/refresh all Microsoft data needed for audit reports.
@@ -437,7 +615,7 @@ def updatemsdata(): #--------------------------------------------------------<<<
         # create the ORG data file, list of organizations to be audited
         # Below is inline automation of this command:
         #   gitdata orgs -amsftgits -sa -nghaudit/orgs.csv -flogin/user/id
-        gdwrapper(endpoint='/user/orgs', filename=orgfile, entity='org', \
+        gdwrapper(endpoint='/user/orgs?per_page=100', filename=orgfile, entity='org', \
             authuser='msftgits', fields=['login', 'user', 'id'], headers={})
 
     # create the TEAM and REPO data files, iterating over ORGs
@@ -449,57 +627,85 @@ def updatemsdata(): #--------------------------------------------------------<<<
         appendcollabs_org(collabfile) # initialize data file
     if write_orgmembers:
         appendorgmembers(omembersfile) # initialize data file
-    firstline = True
-    for line in open(orgfile, 'r').readlines():
-        if firstline:
-            firstline = False
-            continue
-        orgname = line.split(',')[0]
-        print('ORG = ' + orgname)
-        if write_teams:
-            appendteams(teamfile, orgname)
-        if write_repos:
-            appendrepos(repofile, orgname)
-        if write_collabs:
-            appendcollabs_org(collabfile, orgname)
-        if write_orgmembers:
-            appendorgmembers(omembersfile, orgname)
+        loadlinkdata() # loaded here, before orgmemberrows() runs in the workers
+    with open(orgfile, 'r', buffering=1<<20, newline='') as fhandle:
+        reader = csv.reader(fhandle)
+        next(reader, None) # skip header row
+        orgnames = [row[0] for row in reader]
+
+    # API calls for each org are issued concurrently, and the results are
+    # written in org order from this thread as each org completes; all data
+    # files for an org are requested together, and no more than FETCH_WORKERS
+    # orgs are in progress at a time, so that only their results are held in
+    # memory. Each data file is opened once for all orgs.
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor, \
+        contextlib.ExitStack() as datafiles:
+        orgjobs = [] # (csv writer, function returning rows for an org)
+        for write_file, filename, rowsfunc in \
+            [(write_teams, teamfile, teamrows),
+             (write_repos, repofile, reporows),
+             (write_collabs, collabfile, collabrows_org),
+             (write_orgmembers, omembersfile, orgmemberrows)]:
+            if write_file:
+                fhandle = datafiles.enter_context(
+                    open(filename, 'a', buffering=65536, newline=''))
+                orgjobs.append((csv.writer(fhandle, lineterminator='\n'), rowsfunc))
+        pending = collections.deque() # (orgname, [(csv writer, future)])
+        for orgname in orgnames:
+            pending.append((orgname, [(writer, executor.submit(rowsfunc, orgname))
+                                      for writer, rowsfunc in orgjobs]))
+            if len(pending) == FETCH_WORKERS:
+                writeorg(*pending.popleft())
+        while pending:
+            writeorg(*pending.popleft())
 
     if write_collabs:
         # iterate over REPOs to add repo-level collaborators
-        firstline = True
-        for line in open(repofile, 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            orgname = line.split(',')[0]
-            reponame = line.split(',')[1]
-            print('REPO = ' + orgname + '/' + reponame)
-            appendcollabs_repo(collabfile, orgname, reponame)
+        orgnames = []
+        reponames = []
+        with open(repofile, 'r', buffering=1<<20, newline='') as fhandle:
+            reader = csv.reader(fhandle)
+            next(reader, None) # skip header row
+            for row in reader:
+                orgnames.append(row[0])
+                reponames.append(row[1])
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor, \
+            open(collabfile, 'a', buffering=65536, newline='') as fhandle:
+            writer = csv.writer(fhandle, lineterminator='\n')
+            collabresults = boundedmap(executor, collabrows_repo, orgnames, reponames)
+            for orgname, reponame in zip(orgnames, reponames):
+                print('REPO = ' + orgname + '/' + reponame)
+                writer.writerows(next(collabresults))
 
     if write_linkdata:
         updatelinkdata() # get latest Microsoft linking data
 
+    if write_teammembers or write_repoteams:
+        with open(teamfile, 'r', buffering=1<<20, newline='') as fhandle:
+            reader = csv.reader(fhandle)
+            next(reader, None) # skip header row
+            teamdata = list(reader)
+        teamids = [row[2] for row in teamdata]
+
     if write_teammembers:
         appendteammembers(tmembersfile) # initialize data file
-        firstline = True
-        for line in open(teamfile, 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            print(line.strip())
-            teamid = line.split(',')[2]
-            appendteammembers(tmembersfile, teamid)
+        if not hasattr(gd._settings, 'linked'):
+            loadlinkdata() # before teammemberrows() runs in the workers
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor, \
+            open(tmembersfile, 'a', buffering=65536, newline='') as fhandle:
+            writer = csv.writer(fhandle, lineterminator='\n')
+            memberresults = boundedmap(executor, teammemberrows, teamids)
+            for row in teamdata:
+                print(','.join(row))
+                writer.writerows(next(memberresults))
 
     if write_repoteams:
         appendrepoteams(repoteamsfile) # initialize data file
-        firstline = True
-        for line in open(teamfile, 'r').readlines():
-            if firstline:
-                firstline = False
-                continue
-            teamid = line.split(',')[2]
-            appendrepoteams(repoteamsfile, teamid)
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor, \
+            open(repoteamsfile, 'a', buffering=65536, newline='') as fhandle:
+            writer = csv.writer(fhandle, lineterminator='\n')
+            for rows in boundedmap(executor, repoteamrows, teamids):
+                writer.writerows(rows)
 
 def userrepos(acct): #-------------------------------------------------------<<<
     """Print summary of user repositories for an account.
@@ -507,16 +713,25 @@ def userrepos(acct): #-------------------------------------------------------<<<
     printhdr(acct, 'user repositories')
 
     authenticate()
-    endpoint = '/users/' + acct + '/repos'
+    endpoint = '/users/' + acct + '/repos?per_page=100'
     response = gd.github_api(endpoint=endpoint, auth=gd.auth_user())
-    jsondata = json.loads(response.text)
+    jsondata = json_loads(response.content)
     for repo in jsondata:
-        owner = repo['owner']['login']
-        reponame = repo['name']
-        print(owner + '/' + reponame)
+        print('{0}/{1}'.format(repo['owner']['login'], repo['name']))
+
+def writeorg(orgname, orgresults): #-----------------------------------------<<<
+    """Write the data for an org to the data files, as its results complete.
+
+    orgname    = the org name
+    orgresults = list of (csv writer, future) tuples; each future returns the
+                 rows to be written for this org
+    """
+    print('ORG = ' + orgname)
+    for writer, future in orgresults:
+        writer.writerows(future.result())
 
 if __name__ == '__main__':
-    sys.stdout = open(sys.stdout.fileno(), mode='w', encoding='utf8', buffering=1)
+    sys.stdout.reconfigure(encoding='utf-8', line_buffering=False)
     #updatemsdata()
 
     updatelinkdata()
@@ -3,18 +3,157 @@
 Entry point:
 cli() --------------------> Handle command-line arguments.
 """
-import collections
 import configparser
+import csv
+import functools
+import gzip
+import hashlib
+import io
 import json
+import operator
 import os
 import sys
+import threading
 import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from timeit import default_timer
 
 import click
-
-from dougerino import dicts2csv, dicts2json, setting, time_stamp, logcalls
-from githuberino import github_allpages
+import requests
+from urllib3.util.retry import Retry
+
+from dougerino import time_stamp, logcalls
+
+try:
+    import orjson # faster JSON parsing/serialization, if available
+    json_loads = orjson.loads
+except ImportError:
+    orjson = None
+    json_loads = json.loads
+
+# folders are resolved once, rather than for each cache/INI file reference
+SOURCE_FOLDER = os.path.dirname(os.path.realpath(__file__))
+CACHE_FOLDER = os.path.join(SOURCE_FOLDER, 'gh_cache')
+INI_FILE = os.path.join(SOURCE_FOLDER, '../_private/github.ini')
+
+# field names available for each entity, as displayed by list_fields()
+FIELD_NAMES = {
+    'collab': (
+        'avatar_url                 organizations_url',
+        'events_url                 received_events_url',
+        'followers_url              repos_url',
+        'following_url              site_admin',
+        'gists_url                  starred_url',
+        'gravatar_id                subscriptions_url',
+        'html_url                   type',
+        'id                         url',
+        'login',
+        ),
+    'commit': (
+        'comments_url               commit.message',
+        'html_url                   commit.tree.sha',
+        'sha                        commit.tree.url',
+        'url                        commit.url',
+        'author.avatar_url          commit.url',
+        'author.events_url          commit.verification.payload',
+        'author.followers_url       commit.verification.reason',
+        'author.following_url       commit.verification.signature',
+        'author.gists_url           commit.verification.verified',
+        'author.gravatar_id         committer.avatar_url',
+        'author.html_url            committer.events_url',
+        'author.id                  committer.followers_url',
+        'author.login               committer.following_url',
+        'author.organizations_url   committer.gists_url',
+        'author.received_events_url committer.gravatar_id',
+        'author.repos_url           committer.html_url',
+        'author.site_admin          committer.id',
+        'author.starred_url         committer.login',
+        'author.subscriptions_url   committer.organizations_url',
+        'author.type                committer.received_events_url',
+        'author.url                 committer.repos_url',
+        'commit.author.date         committer.site_admin',
+        'commit.author.email        committer.starred_url',
+        'commit.author.name         committer.subscriptions_url',
+        'commit.comment_count       committer.type',
+        'commit.committer.date      committer.url',
+        'commit.committer.email     parents.sha',
+        'commit.committer.name      parents.url',
+        ),
+    'member': (
+        'id                  avatar_url          html_url',
+        'login               events_url          organizations_url',
+        'org                 followers_url       received_events_url',
+        'site_admin          following_url       repos_url',
+        'type                gists_url           starred_url',
+        'url                 gravatar_id         subscriptions_url',
+        ),
+    'org': (
+        'avatar_url',
+        'description',
+        'events_url',
+        'hooks_url',
+        'id',
+        'issues_url',
+        'login',
+        'members_url',
+        'public_members_url',
+        'repos_url',
+        'url',
+        'user',
+        ),
+    'repo': (
+        'archive_url         git_tags_url         open_issues',
+        'assignees_url       git_url              open_issues_count',
+        'blobs_url           has_downloads        private',
+        'branches_url        has_issues           pulls_url',
+        'clone_url           has_pages            pushed_at',
+        'collaborators_url   has_wiki             releases_url',
+        'commits_url         homepage             size',
+        'compare_url         hooks_url            ssh_url',
+        'contents_url        html_url             stargazers_count',
+        'contributors_url    id                   stargazers_url',
+        'created_at          issue_comment_url    statuses_url',
+        'default_branch      issue_events_url     subscribers_url',
+        'deployments_url     issues_url           subscription_url',
+        'description         keys_url             svn_url',
+        'downloads_url       labels_url           tags_url',
+        'events_url          language             teams_url',
+        'fork                languages_url        trees_url',
+        'forks               master_branch        updated_at',
+        'forks_count         merges_url           url',
+        'forks_url           milestones_url       watchers',
+        'full_name           mirror_url           watchers_count',
+        'git_commits_url     name',
+        'git_refs_url        notifications_url',
+        60*'-',
+        'license.featured              owner.login',
+        'license.key                   owner.organizations_url',
+        'license.name                  owner.received_events_url',
+        'license.url                   owner.repos_url',
+        'owner.avatar_url              owner.site_admin',
+        'owner.events_url              owner.starred_url',
+        'owner.followers_url           owner.subscriptions_url',
+        'owner.following_url           owner.type',
+        'owner.gists_url               owner.url',
+        'owner.gravatar_id             permissions.admin',
+        'owner.html_url                permissions.pull',
+        'owner.id                      permissions.push',
+        ),
+    'team': (
+        'description',
+        'id',
+        'members_url',
+        'name',
+        'org',
+        'permission',
+        'privacy',
+        'repositories_url',
+        'slug',
+        'url',
+        ),
+
+    }
 
 CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
 @click.group(context_settings=CONTEXT_SETTINGS, options_metavar='[options]',
@@ -25,9 +164,12 @@ CONTEXT_SETTINGS = dict(help_option_names=['-h', '--help'])
               help='store access token for specified username', metavar='<str>')
 @click.option('-d', '--delete', default=False,
               help='delete specified username', is_flag=True, metavar='')
+@click.option('-e', '--etag', default=False, is_flag=True,
+              help='keep ETag-validated copies of API pages in gh_cache/etag, ' +
+              'so unchanged pages are not counted against the rate limit')
 @click.version_option(version='1.0', prog_name='Gitdata')
 @click.pass_context
-def cli(ctx, auth, token, delete): #-----------------------------------------<<<
+def cli(ctx, auth, token, delete, etag): #-----------------------------------<<<
     """\b
 ------------------------------------
 Get information from GitHub REST API
@@ -37,6 +179,9 @@ syntax help: gitdata <subcommand> -h"""
         auth_status(auth.lower(), token, delete)
         return
 
+    if etag:
+        _settings.etag_cache = os.path.join(CACHE_FOLDER, 'etag')
+
     # note that all subcommands are invoked by the Click framework decorators,
     # so nothing to do here.
 
@@ -53,6 +198,16 @@ class _settings: #-----------------------------------------------------------<<<
 
     # current session object from requests library
     requests_session = None
+    session_lock = threading.Lock() # guards creation of requests_session
+    page_workers = 8 # concurrent page requests in github_data_from_api()
+    # connections kept open for reuse by concurrent API calls; this is also the
+    # maximum number of concurrent API calls (org_workers * page_workers)
+    pool_size = 32
+    server_retries = 3 # retries (with backoff) after a 502/503/504 response
+    org_workers = 4 # orgs retrieved concurrently for org=* (see map_orgs())
+    # folder for ETag-validated copies of API responses (None = don't use);
+    # the gitdata --etag option sets this to gh_cache/etag
+    etag_cache = None
 
     verbose = False # whether to display status information on console
     display_data = True # whether to display retrieved data on console
@@ -63,9 +218,99 @@ class _settings: #-----------------------------------------------------------<<<
     tot_api_bytes = 0 # total bytes returned by these API calls
     last_ratelimit = 0 # API rate limit for the most recent API call
     last_remaining = 0 # remaining portion of rate limit after last API call
+    last_reset = 0 # time (epoch seconds) when the current rate limit resets
+    # wait for the reset if fewer calls than this remain (capped at 10% of the
+    # rate limit, so that low limits such as 60/hour for anonymous calls
+    # aren't mostly held in reserve)
+    ratelimit_reserve = 50
 
     unknownfieldname = set() # list of unknown field names encountered
 
+    # tokens from the INI file ({username: PAT}) and the file's modification
+    # time, cached by access_token()
+    inifile_data = None
+    inifile_mtime = None
+
+class _UrlFields(dict): #----------------------------------------------------<<<
+    """Dictionary of field name -> whether it's a URL field (*_url or url).
+
+    Each name is checked the first time it's looked up, and the result is
+    stored for subsequent lookups.
+    """
+
+    def __missing__(self, fldname):
+        self[fldname] = fldname.endswith('url')
+        return self[fldname]
+
+def access_token(username): #------------------------------------------------<<<
+    """Get the GitHub access token (PAT) for a username from the INI file.
+
+    Returns None if no token is stored for this username. The tokens are
+    cached, and the INI file is only re-read if it has been modified.
+
+    The file is read with a simple line scan rather than configparser; it only
+    contains [username] sections with a PAT entry, as written by auth_status().
+    <internal>
+    """
+    try:
+        mtime = os.path.getmtime(INI_FILE)
+    except OSError:
+        return None # no INI file
+    if mtime != _settings.inifile_mtime:
+        tokens = dict()
+        section = None
+        with open(INI_FILE, 'r') as fhandle:
+            for line in fhandle:
+                line = line.strip()
+                if not line or line[0] in '#;':
+                    continue # blank line or comment
+                if line[0] == '[' and line[-1] == ']':
+                    section = line[1:-1].strip()
+                    continue
+                # key/value delimiter is the first '=' or ':' in the line
+                delimiters = [pos for pos in (line.find('='), line.find(':'))
+                              if pos >= 0]
+                if section is None or not delimiters:
+                    continue
+                key, value = line[:min(delimiters)], line[min(delimiters) + 1:]
+                if key.strip().lower() == 'pat':
+                    tokens[section] = value.strip()
+        _settings.inifile_data, _settings.inifile_mtime = tokens, mtime
+
+    return _settings.inifile_data.get(username, None)
+
+def api_session(): #---------------------------------------------------------<<<
+    """Get the requests session used for GitHub API calls.
+
+    The session is created on first call and reused for the rest of the
+    session, so that connections are kept alive. Its connection pool holds
+    up to _settings.pool_size connections, for concurrent page requests; if
+    more requests than that are made at once (for example, page requests from
+    several orgs at a time), the extra requests wait for a free connection
+    rather than opening connections that would be discarded. Transient server
+    errors (502/503/504) are retried with backoff. The
+    Accept header for version 3 of the GitHub API and a User-Agent that
+    identifies this tool are session defaults.
+    <internal>
+    """
+    if _settings.requests_session:
+        return _settings.requests_session
+
+    # the first call may come from several worker threads at once, so the
+    # session is created under a lock to ensure that only one is created
+    with _settings.session_lock:
+        if not _settings.requests_session:
+            retries = Retry(total=_settings.server_retries, backoff_factor=0.5,
+                            status_forcelist=[502, 503, 504], raise_on_status=False)
+            session = requests.Session()
+            session.mount('https://', requests.adapters.HTTPAdapter(
+                pool_maxsize=_settings.pool_size, pool_block=True,
+                max_retries=retries))
+            session.headers.update({'Accept': 'application/vnd.github.v3+json',
+                                    'User-Agent': 'gitdata/1.0'})
+            _settings.requests_session = session
+    return _settings.requests_session
+
 def auth_config(settings=None): #--------------------------------------------<<<
     """Configure authentication settings.
 
@@ -78,12 +323,16 @@ def auth_config(settings=None): #--------------------------------------------<<<
     config_settings = ['username', 'accesstoken']
 
     # if username is specified but no accesstoken specified, look up this
-    # user's PAT setting()
+    # user's PAT in the INI file
     if settings and 'username' in settings and not 'accesstoken' in settings:
         if not settings['username']:
             settings['accesstoken'] = None
+        elif _settings.datasource == 'c':
+            # reading from cache only; the username is needed for cache
+            # filenames, but no token is needed because no API calls are made
+            settings['accesstoken'] = None
         else:
-            settings['accesstoken'] = setting('github', settings['username'], 'pat')
+            settings['accesstoken'] = access_token(settings['username'])
             if not settings['accesstoken']:
                 click.echo('Unknown authentication username: ' +
                            settings['username'])
@@ -121,10 +370,11 @@ def auth_status(auth, token, delete): #--------------------------------------<<<
             config[auth]['PAT'] = token
         with open(configfile, 'w') as fhandle:
             config.write(fhandle)
+        _settings.inifile_mtime = None # force access_token() to re-read it
 
     # display username and access token
     click.echo('  Username: ' + auth)
-    click.echo('     Token: ' + token_abbr(setting('github', auth, 'pat')))
+    click.echo('     Token: ' + token_abbr(access_token(auth)))
 
 def auth_user(): #-----------------------------------------------------------<<<
     """Credentials for basic authentication.
@@ -154,42 +404,48 @@ def cache_filename(endpoint, auth=None): #-----------------------------------<<<
     endpoint = the endpoint at https://api.github.com (starts with /)
     auth = authentication username
 
-    Returns the filename for caching data returned from this API call.
+    Returns the filename for caching data returned from this API call. If
+    there's no .json.gz cache file but there is an uncompressed .json file
+    from an earlier version of gitdata, the .json filename is returned so
+    that the existing cached data can still be used (cache_update() replaces
+    it with a .json.gz file).
     """
     if not auth:
         auth = _settings.username if _settings.username else '_anon'
 
-    source_folder = os.path.dirname(os.path.realpath(__file__))
-    filename = auth + '_' + endpoint.replace('/', '-').strip('-')
-    if '?' in filename:
-        # remove parameters from the endpoint
-        filename = filename[:filename.find('?')]
-
-    return os.path.join(source_folder, 'gh_cache/' + filename + '.json')
-
-def cache_update(endpoint, payload, constants): #----------------------------<<<
+    path, _, query = endpoint.partition('?')
+    filename = os.path.join(CACHE_FOLDER,
+                            auth + '_' + path.replace('/', '-').strip('-'))
+    # paging parameters are removed, but filters (type=public, role=admin,
+    # etc.) are kept so that filtered results are cached separately
+    filters = ''.join('_' + param + '-' + value for param, value in
+                      urllib.parse.parse_qsl(query)
+                      if param not in ['page', 'per_page'])
+
+    # (earlier versions didn't include filters in the filename, so a .json
+    # file is only used for endpoints without filters)
+    if not filters and not os.path.isfile(filename + '.json.gz') and \
+        os.path.isfile(filename + '.json'):
+        return filename + '.json'
+    return filename + filters + '.json.gz'
+
+def cache_update(endpoint, payload): #---------------------------------------<<<
     """Update cached data.
 
-    endpoint  = the API endpoint (e.g., '/repos/org')
-    payload   = the list of dictionaries returned from API endpoint
-    constants = dictionary of fieldnames/values to be included in the
-                cached data (e.g., criteria used in the API call)
+    endpoint = the API endpoint (e.g., '/repos/org')
+    payload  = the list of dictionaries returned from API endpoint
 
     Writes the cache file for this endpoint. Overwrites existing cached data.
+    The payload is cached as returned by the API; constants (e.g., criteria
+    used in the API call) are added by github_data() whenever data is read.
     """
-
-    if constants:
-        # add the constants to the API payload
-        cached_data = []
-        for data_item in payload:
-            for fldname in constants:
-                data_item[fldname] = constants[fldname]
-            cached_data.append(data_item)
-    else:
-        cached_data = payload # no constants to be added
-
     filename = cache_filename(endpoint)
-    dicts2json(source=payload, filename=filename) # write cached data
+    if not filename.endswith('.gz'):
+        # replace a cache file from an earlier version with a .json.gz file
+        os.remove(filename)
+        filename += '.gz'
+    # cache files are only read by this module, so they're written compact
+    write_json(source=payload, filename=filename, pretty=False)
 
     if _settings.verbose:
         nameonly = os.path.basename(filename)
@@ -250,9 +506,9 @@ def collabs(owner, repo, audit2fa, authuser, source, #-----------------------<<<
         fields=fldnames, constants={"owner": owner, "repo": repo}, headers={})
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
@@ -307,12 +563,104 @@ def commits(owner, repo, authuser, source, filename, fields, #---------------<<<
         fields=fldnames, constants={"owner": owner, "repo": repo}, headers={})
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
+def data_extractor(*, entity=None, fields=None, constants=None): #-----------<<<
+    """Get a function that extracts desired values from GitHub API JSON data.
+
+    entity    = entity type ('repo', 'member')
+    fields    = list of field names or a shorthand value, as for data_fields()
+    constants = dictionary of fieldnames/values, as for data_fields()
+
+    Returns a function that takes a JSON payload and returns a dictionary of
+    fieldnames/values (see data_fields). The field list is parsed once here,
+    so no field names are parsed for each record.
+    <internal>
+    """
+    if not fields:
+        fields = default_fields(entity)
+
+    if fields[0] in ['*', 'urls', 'nourls']:
+        # special cases to return all fields or all url/non-url fields
+        wildcard = fields[0]
+        prefix = constants if constants and wildcard in ['*', 'nourls'] else {}
+
+        # records from an endpoint share the same field names, so each name
+        # is only checked for a 'url' suffix the first time it's seen
+        isurl = _UrlFields()
+
+        def extract_wildcard(jsondata):
+            values = dict(prefix)
+            if wildcard == '*':
+                values.update(jsondata)
+            elif wildcard == 'urls':
+                values.update((fldname, this_item)
+                              for fldname, this_item in jsondata.items()
+                              if isurl[fldname])
+            else:
+                for fldname, this_item in jsondata.items():
+                    if isurl[fldname]:
+                        continue
+                    if isinstance(this_item, dict):
+                        # this is an embedded dictionary, so for the 'nourls'
+                        # case remove *url fields ...
+                        values[fldname] = {key:value for
+                                           (key, value) in this_item.items()
+                                           if not isurl[key]}
+                    else:
+                        values[fldname] = this_item
+            return values
+        return extract_wildcard
+
+    # fields == an actual list of fieldnames, not a special case, so create
+    # a (name, getter function) tuple for each field
+    getters = []
+    for fldname in fields:
+        if constants and fldname in constants:
+            getters.append((fldname,
+                            lambda jsondata, value=constants[fldname]: value))
+        elif fldname.lower() == 'private':
+            getters.append((fldname, lambda jsondata, key=fldname: \
+                'private' if jsondata[key] else 'public'))
+        else:
+            def getvalue(jsondata, keys=tuple(fldname.split('.')), fldname=fldname):
+                try:
+                    for key in keys:
+                        jsondata = jsondata[key]
+                    return jsondata
+                except (TypeError, KeyError):
+                    _settings.unknownfieldname.add(fldname)
+                    return None
+            getters.append((fldname.replace('.', '_'), getvalue))
+
+    def extract(jsondata):
+        return {name: getter(jsondata) for name, getter in getters}
+
+    if any('.' in fldname or fldname.lower() == 'private' or
+           (constants and fldname in constants) for fldname in fields):
+        return extract
+
+    # all fields are top-level names, so their values can be taken in a single
+    # itemgetter call; a record that's missing a field falls back to the
+    # getters above, which log the unknown field name
+    names = tuple(fields)
+    if len(names) == 1:
+        def pick(jsondata, key=names[0]):
+            return (jsondata[key],)
+    else:
+        pick = operator.itemgetter(*names)
+
+    def extract_toplevel(jsondata):
+        try:
+            return dict(zip(names, pick(jsondata)))
+        except (KeyError, TypeError):
+            return extract(jsondata)
+    return extract_toplevel
+
 def data_fields(*, entity=None, jsondata=None, #-----------------------------<<<
                 fields=None, constants=None):
     """Get dictionary of desired values from GitHub API JSON payload.
@@ -330,42 +678,8 @@ def data_fields(*, entity=None, jsondata=None, #-----------------------------<<<
 
     Returns a dictionary of fieldnames/values.
     """
-
-    if not fields:
-        fields = default_fields(entity)
-
-    values = collections.OrderedDict()
-
-    if fields[0] in ['*', 'urls', 'nourls']:
-        # special cases to return all fields or all url/non-url fields
-        if constants and fields[0] in ['*', 'nourls']:
-            values.update(constants)
-        for fldname in jsondata:
-            if fields[0] == '*' or \
-                (fields[0] == 'urls' and fldname.endswith('url')) or \
-                (fields[0] == 'nourls' and not fldname.endswith('url')):
-                this_item = jsondata[fldname]
-                if str(this_item.__class__) == "<class 'dict'>" and \
-                    fields[0] == 'nourls':
-                    # this is an embedded dictionary, so for the 'nourls' case
-                    # remove *url fields ...
-                    values[fldname] = {key:value for
-                                       (key, value) in this_item.items()
-                                       if not key.endswith('url')}
-                else:
-                    values[fldname] = this_item
-    else:
-        # fields == an actual list of fieldnames, not a special case
-        for fldname in fields:
-            if constants and fldname in constants:
-                values[fldname] = constants[fldname]
-            else:
-                values[fldname.replace('.', '_')] = \
-                    nested_json_value(jsondata, fldname)
-                if fldname.lower() == 'private':
-                    values[fldname] = \
-                        'private' if jsondata[fldname] else 'public'
-    return values
+    return data_extractor(entity=entity, fields=fields,
+                          constants=constants)(jsondata)
 
 def data_display(datasource=None): #-----------------------------------------<<<
     """Display data on console.
@@ -377,28 +691,32 @@ def data_display(datasource=None): #-----------------------------------------<<<
     if not _settings.display_data:
         return
 
-    for data_item in datasource:
-        values = [str(value) for _, value in data_item.items()]
-        click.echo(click.style(','.join(values), fg='cyan'))
+    # build the output as one string of CSV rows (quoted as in output files),
+    # so that it's written in a single call; color is only added if the output
+    # is going to a terminal, and redirected output is written directly
+    # (click.echo would scan it for ANSI codes)
+    if datasource:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(
+            data_item.values() for data_item in datasource)
+        output = buffer.getvalue()
+        if sys.stdout.isatty():
+            click.echo(click.style(output, fg='cyan'), nl=False)
+        else:
+            sys.stdout.write(output)
 
     # List unknown field names encountered in this session (if any)
-    try:
-        if _settings.unknownfieldname:
-            click.echo('Unknown field name(s): ' + \
-                ','.join(_settings.unknownfieldname))
-    except AttributeError:
-        # no unknown fields have been logged
-        pass
+    if _settings.unknownfieldname:
+        click.echo('Unknown field name(s): ' + \
+            ','.join(_settings.unknownfieldname))
 
 def data_sort(datadict): #---------------------------------------------------<<<
     """Sort function for output lists.
 
-    takes an OrderedDict object as input, returns lower-case version of the
-    first value in the OrderedDict, for use as a sort key.
+    takes a dictionary as input, returns lower-case version of the first
+    value in the dictionary, for use as a sort key.
     """
-    sortkey = list(datadict.keys())[0]
-    sortvalue = str(datadict[sortkey]).lower()
-    return sortvalue
+    return str(next(iter(datadict.values()))).lower()
 
 def data_write(filename=None, datasource=None): #----------------------------<<<
     """Write output file.
@@ -412,9 +730,9 @@ def data_write(filename=None, datasource=None): #----------------------------<<<
     _, file_ext = os.path.splitext(filename)
 
     if file_ext.lower() == '.json':
-        dicts2json(source=datasource, filename=filename) # write JSON file
+        write_json(source=datasource, filename=filename) # write JSON file
     else:
-        dicts2csv(datasource, filename) # write CSV file
+        write_csv(datasource, filename) # write CSV file
 
     click.echo('Output file written: ' + filename)
 
@@ -468,6 +786,60 @@ def filename_valid(filename=None): #-----------------------------------------<<<
 
     return True
 
+def github_api(*, endpoint=None, auth=None, headers=None): #-----------------<<<
+    """Call the GitHub API.
+
+    endpoint = the HTTP endpoint to call; if it starts with /, it's appended
+               to https://api.github.com, otherwise it's used as a full URL
+               (for example, a page URL from a Link header)
+    auth     = optional authentication tuple - (username, pat)
+    headers  = optional dictionary of HTTP headers to pass
+
+    Returns the response object. The Accept header for version 3 of the
+    GitHub API is sent unless a different Accept header is passed.
+    <internal>
+    """
+    url = 'https://api.github.com' + endpoint if endpoint.startswith('/') \
+        else endpoint
+
+    # if the rate limit is nearly used up, wait for it to reset rather than
+    # making calls that will fail (concurrent callers all wait here)
+    reserve = min(_settings.ratelimit_reserve, _settings.last_ratelimit // 10)
+    if _settings.last_ratelimit and _settings.last_remaining < reserve:
+        wait_seconds = _settings.last_reset - time.time()
+        if wait_seconds > 0:
+            click.echo('Rate limit: ' + str(_settings.last_remaining) +
+                       ' calls remaining, waiting ' + str(int(wait_seconds) + 1) +
+                       ' seconds for reset')
+            time.sleep(wait_seconds + 1)
+
+    for attempt in range(2):
+        response = api_session().get(url, auth=auth, headers=headers)
+
+        # update session totals and rate-limit status
+        _settings.tot_api_calls += 1
+        _settings.tot_api_bytes += len(response.content)
+        if 'X-RateLimit-Limit' in response.headers:
+            _settings.last_ratelimit = int(response.headers['X-RateLimit-Limit'])
+            _settings.last_remaining = int(response.headers['X-RateLimit-Remaining'])
+            _settings.last_reset = int(response.headers['X-RateLimit-Reset'])
+
+        # if the call was rejected by a rate limit (including GitHub's secondary
+        # limits on concurrent requests), wait as instructed and retry once
+        if attempt or response.status_code not in [403, 429]:
+            break
+        if 'Retry-After' in response.headers:
+            wait_seconds = int(response.headers['Retry-After'])
+        elif response.headers.get('X-RateLimit-Remaining') == '0':
+            wait_seconds = _settings.last_reset - time.time()
+        else:
+            break # not rate-limited (e.g., insufficient permissions)
+        click.echo('Rate limit: waiting ' + str(int(max(wait_seconds, 0)) + 1) +
+                   ' seconds to retry ' + url)
+        time.sleep(max(wait_seconds, 0) + 1)
+
+    return response
+
 def github_data(*, endpoint=None, entity=None, fields=None, #----------------<<<
                 constants=None, headers=None):
     """Get data for specified GitHub API endpoint.
@@ -514,9 +886,8 @@ def github_data(*, endpoint=None, entity=None, fields=None, #----------------<<<
         sys.exit(0)
 
     if read_from == 'a':
-        all_fields = github_allpages(endpoint=endpoint, auth=auth_user(),
-                                     headers=headers, state=_settings)
-        cache_update(endpoint, all_fields, constants)
+        all_fields = github_data_from_api(endpoint=endpoint, headers=headers)
+        cache_update(endpoint, all_fields)
     elif read_from == 'c' and cache_exists(endpoint):
         all_fields = github_data_from_cache(endpoint=endpoint)
         if _settings.verbose:
@@ -527,11 +898,55 @@ def github_data(*, endpoint=None, entity=None, fields=None, #----------------<<<
         all_fields = []
 
     # extract the requested fields and return them
-    retval = []
-    for json_item in all_fields:
-        retval.append(data_fields(entity=entity, jsondata=json_item,
-                                  fields=fields, constants=constants))
-    return retval
+    extract = data_extractor(entity=entity, fields=fields, constants=constants)
+    return [extract(json_item) for json_item in all_fields]
+
+def github_data_from_api(endpoint=None, headers=None): #---------------------<<<
+    """Get data from the GitHub API, handling pagination.
+
+    endpoint = HTTP endpoint for GitHub API call
+    headers  = HTTP headers to be included with API call
+
+    Returns a list of dictionaries containing all pages of data. If the first
+    response's Link header identifies the last page, the remaining pages are
+    requested concurrently (up to _settings.page_workers at a time).
+    <internal>
+    """
+    # request the maximum page size if the endpoint doesn't specify one, to
+    # minimize the number of pages
+    if 'per_page=' not in endpoint:
+        endpoint += ('&' if '?' in endpoint else '?') + 'per_page=100'
+
+    payload, links = github_page(endpoint, headers)
+    if payload is None:
+        return []
+
+    if 'last' in links:
+        # build the URLs for pages 2 through last, and fetch them concurrently
+        lasturl = urllib.parse.urlsplit(links['last']['url'])
+        query = dict(urllib.parse.parse_qsl(lasturl.query))
+        pageurls = []
+        for pageno in range(2, int(query['page']) + 1):
+            query['page'] = str(pageno)
+            pageurls.append(urllib.parse.urlunsplit(
+                lasturl._replace(query=urllib.parse.urlencode(query))))
+        # (no more workers than pages, and none beyond the remaining rate limit)
+        workers = min(_settings.page_workers, len(pageurls),
+                      _settings.last_remaining or _settings.page_workers)
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            for pagedata, _ in executor.map(
+                    lambda url: github_page(url, headers), pageurls):
+                if pagedata is not None:
+                    payload.extend(pagedata)
+    else:
+        # no last-page link, so follow the next-page links (if any)
+        while 'next' in links:
+            pagedata, links = github_page(links['next']['url'], headers)
+            if pagedata is None:
+                break
+            payload.extend(pagedata)
+
+    return payload
 
 def github_data_from_cache(endpoint=None): #---------------------------------<<<
     """Get data from local cache file.
@@ -541,13 +956,53 @@ def github_data_from_cache(endpoint=None): #---------------------------------<<<
     filename = cache_filename(endpoint)
     return read_json(filename)
 
+def github_page(endpoint, headers=None): #-----------------------------------<<<
+    """Get one page of data from the GitHub API.
+
+    endpoint = HTTP endpoint (or full page URL) for GitHub API call
+    headers  = HTTP headers to be included with API call
+
+    Returns a tuple of (data, links): the deserialized JSON payload (None if
+    the call failed) and the parsed Link header of the response.
+
+    If _settings.etag_cache is set, responses are saved (gzipped) in that
+    folder along with their ETag, and later requests for the same page send
+    If-None-Match. A 304 (Not Modified) response is served from the saved
+    copy, and doesn't count against the rate limit.
+    <internal>
+    """
+    cachefile = None
+    cached = None
+    if _settings.etag_cache:
+        cachekey = hashlib.sha1(
+            ((_settings.username or '_anon') + ' ' + endpoint + ' ' +
+             str(sorted((headers or {}).items()))).encode('utf-8')).hexdigest()
+        cachefile = os.path.join(_settings.etag_cache, cachekey + '.json.gz')
+        if os.path.isfile(cachefile):
+            cached = read_json(cachefile)
+            headers = dict(headers or {}, **{'If-None-Match': cached['etag']})
+
+    response = github_api(endpoint=endpoint, auth=auth_user(), headers=headers)
+    if cached and response.status_code == 304:
+        return cached['data'], cached['links']
+    if not response.ok:
+        click.echo('ERROR: ' + str(response.status_code) + ' returned by ' + response.url)
+        return None, {}
+
+    data = json_loads(response.content)
+    if cachefile and 'ETag' in response.headers:
+        os.makedirs(_settings.etag_cache, exist_ok=True)
+        write_json(source={'etag': response.headers['ETag'],
+                           'links': response.links, 'data': data},
+                   filename=cachefile, pretty=False)
+    return data, response.links
+
 def inifile_name(): #--------------------------------------------------------<<<
     """Return full name of INI file where GitHub tokens are stored.
     Note that this file is stored in a 'private' subfolder under the parent
     folder of the gitdata module.
     """
-    source_folder = os.path.dirname(os.path.realpath(__file__))
-    return os.path.join(source_folder, '../_private/github.ini')
+    return INI_FILE
 
 def list_fields(entity=None): #----------------------------------------------<<<
     """Display available field names for an entity.
@@ -555,186 +1010,33 @@ def list_fields(entity=None): #----------------------------------------------<<<
     entity = the entity type (e.g., 'org' or 'team')
 
     Displays to the console a list of available field names for this entity.
+    The help text is assembled first and written with a single click.echo().
     """
-    click.echo('\nDefault fields for ' + entity.upper() + 'S: ', nl=False)
-    click.echo(click.style('/'.join(default_fields(entity)), fg='cyan'))
-    click.echo(click.style(60*'-', fg='blue'))
-    wildcard_fields()
-
-    if entity == 'collab':
-        click.echo(click.style('avatar_url'.ljust(27) + 'organizations_url', fg='cyan'))
-        click.echo(click.style('events_url'.ljust(27) + 'received_events_url', fg='cyan'))
-        click.echo(click.style('followers_url'.ljust(27) + 'repos_url', fg='cyan'))
-        click.echo(click.style('following_url'.ljust(27) + 'site_admin', fg='cyan'))
-        click.echo(click.style('gists_url'.ljust(27) + 'starred_url', fg='cyan'))
-        click.echo(click.style('gravatar_id'.ljust(27) + 'subscriptions_url', fg='cyan'))
-        click.echo(click.style('html_url'.ljust(27) + 'type', fg='cyan'))
-        click.echo(click.style('id'.ljust(27) + 'url', fg='cyan'))
-        click.echo(click.style('login', fg='cyan'))
-    elif entity == 'commit':
-        click.echo(click.style('comments_url'.ljust(27) +
-                               'commit.message', fg='cyan'))
-        click.echo(click.style('html_url'.ljust(27) +
-                               'commit.tree.sha', fg='cyan'))
-        click.echo(click.style('sha'.ljust(27) +
-                               'commit.tree.url', fg='cyan'))
-        click.echo(click.style('url'.ljust(27) +
-                               'commit.url', fg='cyan'))
-        click.echo(click.style('author.avatar_url'.ljust(27) +
-                               'commit.url', fg='cyan'))
-        click.echo(click.style('author.events_url'.ljust(27) +
-                               'commit.verification.payload', fg='cyan'))
-        click.echo(click.style('author.followers_url'.ljust(27) +
-                               'commit.verification.reason', fg='cyan'))
-        click.echo(click.style('author.following_url'.ljust(27) +
-                               'commit.verification.signature', fg='cyan'))
-        click.echo(click.style('author.gists_url'.ljust(27) +
-                               'commit.verification.verified', fg='cyan'))
-        click.echo(click.style('author.gravatar_id'.ljust(27) +
-                               'committer.avatar_url', fg='cyan'))
-        click.echo(click.style('author.html_url'.ljust(27) +
-                               'committer.events_url', fg='cyan'))
-        click.echo(click.style('author.id'.ljust(27) +
-                               'committer.followers_url', fg='cyan'))
-        click.echo(click.style('author.login'.ljust(27) +
-                               'committer.following_url', fg='cyan'))
-        click.echo(click.style('author.organizations_url'.ljust(27) +
-                               'committer.gists_url', fg='cyan'))
-        click.echo(click.style('author.received_events_url'.ljust(27) +
-                               'committer.gravatar_id', fg='cyan'))
-        click.echo(click.style('author.repos_url'.ljust(27) +
-                               'committer.html_url', fg='cyan'))
-        click.echo(click.style('author.site_admin'.ljust(27) +
-                               'committer.id', fg='cyan'))
-        click.echo(click.style('author.starred_url'.ljust(27) +
-                               'committer.login', fg='cyan'))
-        click.echo(click.style('author.subscriptions_url'.ljust(27) +
-                               'committer.organizations_url', fg='cyan'))
-        click.echo(click.style('author.type'.ljust(27) +
-                               'committer.received_events_url', fg='cyan'))
-        click.echo(click.style('author.url'.ljust(27) +
-                               'committer.repos_url', fg='cyan'))
-        click.echo(click.style('commit.author.date'.ljust(27) +
-                               'committer.site_admin', fg='cyan'))
-        click.echo(click.style('commit.author.email'.ljust(27) +
-                               'committer.starred_url', fg='cyan'))
-        click.echo(click.style('commit.author.name'.ljust(27) +
-                               'committer.subscriptions_url', fg='cyan'))
-        click.echo(click.style('commit.comment_count'.ljust(27) +
-                               'committer.type', fg='cyan'))
-        click.echo(click.style('commit.committer.date'.ljust(27) +
-                               'committer.url', fg='cyan'))
-        click.echo(click.style('commit.committer.email'.ljust(27) +
-                               'parents.sha', fg='cyan'))
-        click.echo(click.style('commit.committer.name'.ljust(27) +
-                               'parents.url', fg='cyan'))
-    elif entity == 'member':
-        click.echo(click.style('id                  avatar_url          ' +
-                               'html_url', fg='cyan'))
-        click.echo(click.style('login               events_url          ' +
-                               'organizations_url', fg='cyan'))
-        click.echo(click.style('org                 followers_url       ' +
-                               'received_events_url', fg='cyan'))
-        click.echo(click.style('site_admin          following_url       ' +
-                               'repos_url', fg='cyan'))
-        click.echo(click.style('type                gists_url           ' +
-                               'starred_url', fg='cyan'))
-        click.echo(click.style('url                 gravatar_id         ' +
-                               'subscriptions_url', fg='cyan'))
-    elif entity == 'org':
-        click.echo(click.style('avatar_url', fg='cyan'))
-        click.echo(click.style('description', fg='cyan'))
-        click.echo(click.style('events_url', fg='cyan'))
-        click.echo(click.style('hooks_url', fg='cyan'))
-        click.echo(click.style('id', fg='cyan'))
-        click.echo(click.style('issues_url', fg='cyan'))
-        click.echo(click.style('login', fg='cyan'))
-        click.echo(click.style('members_url', fg='cyan'))
-        click.echo(click.style('public_members_url', fg='cyan'))
-        click.echo(click.style('repos_url', fg='cyan'))
-        click.echo(click.style('url', fg='cyan'))
-        click.echo(click.style('user', fg='cyan'))
-    elif entity == 'repo':
-        click.echo(click.style('archive_url         git_tags_url         ' +
-                               'open_issues', fg='cyan'))
-        click.echo(click.style('assignees_url       git_url              ' +
-                               'open_issues_count', fg='cyan'))
-        click.echo(click.style('blobs_url           has_downloads        ' +
-                               'private', fg='cyan'))
-        click.echo(click.style('branches_url        has_issues           ' +
-                               'pulls_url', fg='cyan'))
-        click.echo(click.style('clone_url           has_pages            ' +
-                               'pushed_at', fg='cyan'))
-        click.echo(click.style('collaborators_url   has_wiki             ' +
-                               'releases_url', fg='cyan'))
-        click.echo(click.style('commits_url         homepage             ' +
-                               'size', fg='cyan'))
-        click.echo(click.style('compare_url         hooks_url            ' +
-                               'ssh_url', fg='cyan'))
-        click.echo(click.style('contents_url        html_url             ' +
-                               'stargazers_count', fg='cyan'))
-        click.echo(click.style('contributors_url    id                   ' +
-                               'stargazers_url', fg='cyan'))
-        click.echo(click.style('created_at          issue_comment_url    ' +
-                               'statuses_url', fg='cyan'))
-        click.echo(click.style('default_branch      issue_events_url     ' +
-                               'subscribers_url', fg='cyan'))
-        click.echo(click.style('deployments_url     issues_url           ' +
-                               'subscription_url', fg='cyan'))
-        click.echo(click.style('description         keys_url             ' +
-                               'svn_url', fg='cyan'))
-        click.echo(click.style('downloads_url       labels_url           ' +
-                               'tags_url', fg='cyan'))
-        click.echo(click.style('events_url          language             ' +
-                               'teams_url', fg='cyan'))
-        click.echo(click.style('fork                languages_url        ' +
-                               'trees_url', fg='cyan'))
-        click.echo(click.style('forks               master_branch        ' +
-                               'updated_at', fg='cyan'))
-        click.echo(click.style('forks_count         merges_url           ' +
-                               'url', fg='cyan'))
-        click.echo(click.style('forks_url           milestones_url       ' +
-                               'watchers', fg='cyan'))
-        click.echo(click.style('full_name           mirror_url           ' +
-                               'watchers_count', fg='cyan'))
-        click.echo(click.style('git_commits_url     name', fg='cyan'))
-        click.echo(click.style('git_refs_url        notifications_url', fg='cyan'))
-        click.echo(click.style(60*'-', fg='blue'))
-        click.echo(click.style('license.featured              ' +
-                               'owner.login', fg='cyan'))
-        click.echo(click.style('license.key                   ' +
-                               'owner.organizations_url', fg='cyan'))
-        click.echo(click.style('license.name                  ' +
-                               'owner.received_events_url', fg='cyan'))
-        click.echo(click.style('license.url                   ' +
-                               'owner.repos_url', fg='cyan'))
-        click.echo(click.style('owner.avatar_url              ' +
-                               'owner.site_admin', fg='cyan'))
-        click.echo(click.style('owner.events_url              ' +
-                               'owner.starred_url', fg='cyan'))
-        click.echo(click.style('owner.followers_url           ' +
-                               'owner.subscriptions_url', fg='cyan'))
-        click.echo(click.style('owner.following_url           ' +
-                               'owner.type', fg='cyan'))
-        click.echo(click.style('owner.gists_url               ' +
-                               'owner.url', fg='cyan'))
-        click.echo(click.style('owner.gravatar_id             ' +
-                               'permissions.admin', fg='cyan'))
-        click.echo(click.style('owner.html_url                ' +
-                               'permissions.pull', fg='cyan'))
-        click.echo(click.style('owner.id                      ' +
-                               'permissions.push', fg='cyan'))
-    elif entity == 'team':
-        click.echo(click.style('description', fg='cyan'))
-        click.echo(click.style('id', fg='cyan'))
-        click.echo(click.style('members_url', fg='cyan'))
-        click.echo(click.style('name', fg='cyan'))
-        click.echo(click.style('org', fg='cyan'))
-        click.echo(click.style('permission', fg='cyan'))
-        click.echo(click.style('privacy', fg='cyan'))
-        click.echo(click.style('repositories_url', fg='cyan'))
-        click.echo(click.style('slug', fg='cyan'))
-        click.echo(click.style('url', fg='cyan'))
+    lines = ['\nDefault fields for ' + entity.upper() + 'S: ' +
+             click.style('/'.join(default_fields(entity)), fg='cyan'),
+             click.style(60*'-', fg='blue'),
+             wildcard_fields()]
+    lines.extend(click.style(line, fg='blue' if line.startswith('-') else 'cyan')
+                 for line in FIELD_NAMES.get(entity, ()))
+    click.echo('\n'.join(lines))
+
+def map_orgs(function, orgnames): #------------------------------------------<<<
+    """Call a function for each of a list of organizations.
+
+    function = function to be called, with an org name as its only argument
+    orgnames = list of org names
+
+    Returns a list of the function's return values, in the same order as
+    orgnames. The calls are made concurrently (up to _settings.org_workers at a
+    time), unless the user will be prompted to select the data source for
+    each endpoint (datasource='p').
+    <internal>
+    """
+    if _settings.datasource not in ['a', 'c']:
+        return [function(orgname) for orgname in orgnames]
+
+    with ThreadPoolExecutor(max_workers=_settings.org_workers) as executor:
+        return list(executor.map(function, orgnames))
 
 @cli.command(help='Get member information by org or team ID')
 @click.option('-o', '--org', default='',
@@ -789,9 +1091,9 @@ def members(org, team, audit2fa, adminonly, authuser, #----------------------<<<
                            authname=authuser, adminonly=adminonly, fields=fldnames)
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
@@ -826,10 +1128,12 @@ def membersdata(*, org=None, team=None, fields=None, authname=None, #--------<<<
                 click.echo('ERROR: -a option required for org=* syntax.')
                 return []
             user_orgs = orglist(authname)
-            for orgid in user_orgs:
-                memberlist.extend( \
-                    membersget(org=orgid, fields=fields,
-                               audit2fa=audit2fa, adminonly=adminonly))
+            for orgmembers in map_orgs(
+                    lambda orgid: membersget(org=orgid, fields=fields,
+                                             audit2fa=audit2fa,
+                                             adminonly=adminonly),
+                    user_orgs):
+                memberlist.extend(orgmembers)
         else:
             # get members for a single specified organization
             memberlist.extend( \
@@ -866,49 +1170,6 @@ def membersget(*, org=None, team=None, fields=None, #------------------------<<<
     return github_data(endpoint=endpoint, entity='member', fields=fields,
                        constants={"org": org}, headers={})
 
-def nested_json_value(nested_dict, dot_fldname): #---------------------------<<<
-    """Return a nested value from a JSON data structure.
-
-    nested_dict = a JSON object, which contains nested dictionaries (nested up
-                  to 4 levels deep)
-    dot_fldname = a dot-notation reference to a value nested inside the JSON
-                  for example, 'commit.committer.date' would return the value
-                  nested_dict['commit']['committer']['date']
-    """
-    depth = dot_fldname.count('.') + 1
-    keys = dot_fldname.split('.')
-    if depth == 1:
-        try:
-            retval = nested_dict[dot_fldname]
-        except (TypeError, KeyError):
-            _settings.unknownfieldname.add(dot_fldname)
-            retval = None
-    elif depth == 2:
-        try:
-            retval = nested_dict[keys[0]][keys[1]]
-        except (TypeError, KeyError):
-            _settings.unknownfieldname.add(dot_fldname)
-            retval = None
-    elif depth == 3:
-        try:
-            retval = nested_dict[keys[0]][keys[1]][keys[2]]
-        except (TypeError, KeyError):
-            _settings.unknownfieldname.add(dot_fldname)
-            retval = None
-    elif depth == 4:
-        try:
-            retval = nested_dict[keys[0]][keys[1]][keys[2]][keys[3]]
-        except (TypeError, KeyError):
-            _settings.unknownfieldname.add(dot_fldname)
-            retval = None
-    else:
-        try:
-            retval = nested_dict[keys[0]][keys[1]][keys[2]][keys[3]][keys[4]]
-        except (TypeError, KeyError):
-            _settings.unknownfieldname.add(dot_fldname)
-            retval = None
-    return retval
-
 def orglist(authname=None, contoso=False): #---------------------------------<<<
     """Get all orgs for a GitHub user.
 
@@ -919,7 +1180,7 @@ def orglist(authname=None, contoso=False): #---------------------------------<<<
     Returns a list of all GitHub organizations that this user is a member of.
     """
     auth_config({'username': authname})
-    templist = github_data(endpoint='/user/orgs', entity='org', fields=['login'],
+    templist = github_data(endpoint='/user/orgs?per_page=100', entity='org', fields=['login'],
                            constants={"user": authname}, headers={})
     sortedlist = sorted([_['login'].lower() for _ in templist])
 
@@ -970,25 +1231,26 @@ def orgs(authuser, source, filename, fields, #-------------------------------<<<
     auth_config({'username': authuser})
     fldnames = fields.split('/') if fields else None
     templist = github_data(
-        endpoint='/user/orgs', entity='org', fields=fldnames,
+        endpoint='/user/orgs?per_page=100', entity='org', fields=fldnames,
         constants={"user": authuser}, headers={})
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
 def read_json(filename=None): #----------------------------------------------<<<
     """Read .json file into a Python object.
 
-    filename = the filename
+    filename = the filename (.json.gz files are decompressed)
     Returns the object that has been serialized to the .json file (list, etc).
     <internal>
     """
-    with open(filename, 'r') as datafile:
-        retval = json.loads(datafile.read())
+    opener = gzip.open if filename.endswith('.gz') else open
+    with opener(filename, 'rb') as datafile:
+        retval = json_loads(datafile.read())
     return retval
 
 @cli.command(help='Get repo information by org or user/owner')
@@ -996,6 +1258,11 @@ def read_json(filename=None): #----------------------------------------------<<<
               help='GitHub org (* = all orgs authuser is a member of)', metavar='<str>')
 @click.option('-u', '--user', default='',
               help='GitHub user', metavar='<str>')
+@click.option('-t', '--type', 'repotype', default=None,
+              type=click.Choice(['all', 'public', 'private', 'forks',
+                                 'sources', 'member', 'owner']),
+              help='repo type - all/public/private/forks/sources/member ' +
+              '(org) or all/owner/member (user)', metavar='<str>')
 @click.option('-a', '--authuser', default='',
               help='authentication username', metavar='<str>')
 @click.option('-s', '--source', default='p',
@@ -1010,7 +1277,7 @@ def read_json(filename=None): #----------------------------------------------<<<
               help="Display verbose status info")
 @click.option('-l', '--listfields', is_flag=True,
               help='list available fields and exit.')
-def repos(org, user, authuser, source, filename, #---------------------------<<<
+def repos(org, user, repotype, authuser, source, filename, #-----------------<<<
           fields, display, verbose, listfields):
     """Get repository information.
     """
@@ -1022,6 +1289,12 @@ def repos(org, user, authuser, source, filename, #---------------------------<<<
     if not org and not user:
         click.echo('ERROR: must specify an org or user')
         return
+    if repotype and repotype not in \
+        (['all', 'public', 'private', 'forks', 'sources', 'member'] if org
+         else ['all', 'owner', 'member']):
+        click.echo('ERROR: type=' + repotype + ' is not valid for ' +
+                   ('an org' if org else 'a user'))
+        return
     if not filename_valid(filename):
         return
 
@@ -1036,16 +1309,18 @@ def repos(org, user, authuser, source, filename, #---------------------------<<<
     # retrieve requested data
     auth_config({'username': authuser})
     fldnames = fields.split('/') if fields else None
-    templist = reposdata(org=org, user=user, fields=fldnames, authname=authuser)
+    templist = reposdata(org=org, user=user, fields=fldnames, authname=authuser,
+                         repotype=repotype)
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
-def reposdata(*, org=None, user=None, fields=None, authname=None): #---------<<<
+def reposdata(*, org=None, user=None, fields=None, authname=None, #----------<<<
+              repotype=None):
     """Get repo information for one or more organizations or users.
 
     org      = organization; an organization or list of organizations
@@ -1061,6 +1336,9 @@ def reposdata(*, org=None, user=None, fields=None, authname=None): #---------<<<
                fields=['nourls'] -> return all non-URL fields (not *_url or url)
                fields=['urls'] ----> return all URL fields (*_url and url)
     authname = GitHub authentication username; required for org=* syntax
+    repotype = optional type of repos to return (the API's type parameter);
+               filtering is done by the API, so only matching repos are
+               retrieved
 
     Returns a list of dictionary objects, one per repo.
     """
@@ -1074,24 +1352,27 @@ def reposdata(*, org=None, user=None, fields=None, authname=None): #---------<<<
                 click.echo('ERROR: -a option required for org=* syntax.')
                 return []
             user_orgs = orglist(authname)
-            for orgid in user_orgs:
-                repolist.extend(reposget(org=orgid, fields=fields))
+            for orgrepos in map_orgs(
+                    lambda orgid: reposget(org=orgid, fields=fields,
+                                           repotype=repotype), user_orgs):
+                repolist.extend(orgrepos)
         else:
             # get repos for specified organization
-            repolist.extend(reposget(org=org, fields=fields))
+            repolist.extend(reposget(org=org, fields=fields, repotype=repotype))
     else:
         # get repos by user
-        repolist.extend(reposget(user=user, fields=fields))
+        repolist.extend(reposget(user=user, fields=fields, repotype=repotype))
 
     return repolist
 
-def reposget(*, org=None, user=None, fields=None): #-------------------------<<<
+def reposget(*, org=None, user=None, fields=None, repotype=None): #----------<<<
     """Get repo information for a specified org or user. Called by repos() to
     aggregate repo information for multiple orgs or users.
 
     org = organization name
     user = username (ignored if org is provided)
     fields = list of fields to be returned
+    repotype = optional repo type filter (e.g., 'public' or 'sources')
 
     Returns a list of dictionaries containing the specified fields.
 
@@ -1105,6 +1386,8 @@ def reposget(*, org=None, user=None, fields=None): #-------------------------<<<
         endpoint = '/orgs/' + org + '/repos?per_page=100'
     else:
         endpoint = '/users/' + user + '/repos?per_page=100'
+    if repotype:
+        endpoint += '&type=' + repotype
 
     # custom header to retrieve license info while License API is in preview
     headers = {'Accept': 'application/vnd.github.drax-preview+json'}
@@ -1160,9 +1443,9 @@ def teams(org, authuser, source, filename, fields, #-------------------------<<<
         fields=fldnames, constants={"org": org}, headers={})
 
     # handle returned data
-    sorted_data = sorted(templist, key=data_sort)
-    data_display(sorted_data)
-    data_write(filename, sorted_data)
+    templist.sort(key=data_sort)
+    data_display(templist)
+    data_write(filename, templist)
 
     elapsed_time(start_time)
 
@@ -1178,21 +1461,69 @@ def token_abbr(accesstoken): #-----------------------------------------------<<<
         return "*none*"
 
 def wildcard_fields(): #-----------------------------------------------------<<<
-    """Display wildcard field options.
+    """Return wildcard field options, as a string for display.
+    """
+    options = [('       specify fields -->  --fields=', 'fld1/fld2/etc'),
+               ('           ALL fields -->  --fields=', '*'),
+               ('              No URLs -->  --fields=', 'nourls'),
+               ('            Only URLs -->  --fields=', 'urls')]
+    lines = [click.style(prompt, fg='white') + click.style(value, fg='cyan')
+             for prompt, value in options]
+    lines.append(click.style(60*'-', fg='blue'))
+    return '\n'.join(lines)
+
+def write_csv(listobj, filename): #------------------------------------------<<<
+    """Write list of dictionaries to a CSV file.
+
+    listobj  = the list of dictionaries
+    filename = name of CSV file
+
+    The keys of the first dictionary are written as the header row, and each
+    row's values are written in the same order.
+    <internal>
+    """
+    with open(filename, 'w', buffering=1<<20, newline='') as fhandle:
+        if not listobj:
+            return
+        header = list(listobj[0].keys())
+        writer = csv.writer(fhandle, lineterminator='\n')
+        writer.writerow(header)
+        if len(header) == 1:
+            writer.writerows([row[header[0]]] for row in listobj)
+        else:
+            getter = operator.itemgetter(*header)
+            writer.writerows(getter(row) for row in listobj)
+
+def write_json(source=None, filename=None, pretty=True): #-------------------<<<
+    """Write a Python object to a .json file.
+
+    source   = the object to be serialized (list of dictionaries, etc.)
+    filename = the filename
+    pretty   = whether to write indented JSON with sorted keys (the format of
+               output files); cache files are only read back by this module,
+               so they're written compact (smaller and faster)
+
+    If filename ends with .gz, the file is gzip-compressed. The data is written
+    to a temporary file that then replaces filename, so an interrupted write
+    can't leave a partial file behind.
+    <internal>
     """
-    click.echo(click.style('       specify fields -->  --fields=',
-                           fg='white'), nl=False)
-    click.echo(click.style('fld1/fld2/etc', fg='cyan'))
-    click.echo(click.style('           ALL fields -->  --fields=',
-                           fg='white'), nl=False)
-    click.echo(click.style('*', fg='cyan'))
-    click.echo(click.style('              No URLs -->  --fields=',
-                           fg='white'), nl=False)
-    click.echo(click.style('nourls', fg='cyan'))
-    click.echo(click.style('            Only URLs -->  --fields=',
-                           fg='white'), nl=False)
-    click.echo(click.style('urls', fg='cyan'))
-    click.echo(click.style(60*'-', fg='blue'))
+    if filename.endswith('.gz'):
+        opener = functools.partial(gzip.open, compresslevel=3)
+    else:
+        opener = open
+    tempname = filename + '.tmp'
+    if pretty:
+        # orjson only supports 2-space indents, so output files use json
+        with opener(tempname, 'wt') as fhandle:
+            json.dump(source, fhandle, indent=4, sort_keys=True)
+    elif orjson:
+        with opener(tempname, 'wb') as fhandle:
+            fhandle.write(orjson.dumps(source))
+    else:
+        with opener(tempname, 'wt') as fhandle:
+            json.dump(source, fhandle, separators=(',', ':'))
+    os.replace(tempname, filename)
 
 # code to execute when running standalone
 if __name__ == '__main__':
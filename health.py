@@ -10,19 +10,20 @@ HEADERS_DICT = {"Accept": "application/vnd.github.black-panther-preview+json"}
 
 print('org,repo,id,health_percentage,code_of_conduct,license,has_readme,has_contributing')
 
-for line in open('temp.csv', 'r').readlines():
-    values = line.strip().split(',')
-    repo = values[0]
-    org = values[1]
-    repoid = values[2]
+with open('temp.csv', 'r') as fhandle:
+    for line in fhandle:
+        values = line.strip().split(',')
+        repo = values[0]
+        org = values[1]
+        repoid = values[2]
 
-    ENDPOINT = '/repositories/' + repoid + '/community/profile'
-    RESPONSE = gd.github_api(endpoint=ENDPOINT, auth=gd.auth_user(), headers=HEADERS_DICT)
-    JSONDATA = json.loads(RESPONSE.text)
+        ENDPOINT = '/repositories/' + repoid + '/community/profile'
+        RESPONSE = gd.github_api(endpoint=ENDPOINT, auth=gd.auth_user(), headers=HEADERS_DICT)
+        JSONDATA = json.loads(RESPONSE.content)
 
-    print(org + ',' + repo + ',' + repoid + ',' + \
-        str(JSONDATA.get('health_percentage', 0)) + ',' + \
-        str(JSONDATA.get('code_of_conduct', 'None')) + ',' + \
-        str(JSONDATA.get('license', 'None')) + ',' + \
-        str(JSONDATA.get('has_readme', 'False')) + ',' + \
-        str(JSONDATA.get('has_contributing', 'False')))
+        print(org + ',' + repo + ',' + repoid + ',' + \
+            str(JSONDATA.get('health_percentage', 0)) + ',' + \
+            str(JSONDATA.get('code_of_conduct', 'None')) + ',' + \
+            str(JSONDATA.get('license', 'None')) + ',' + \
+            str(JSONDATA.get('has_readme', 'False')) + ',' + \
+            str(JSONDATA.get('has_contributing', 'False')))
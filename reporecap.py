@@ -5,6 +5,7 @@ TO DO:
 - automate the creation of the XLSX
 """
 import collections
+import csv
 
 #-------------------------------------------------------------------------------
 def get_totals(filename):
@@ -19,20 +20,21 @@ def get_totals(filename):
     """
     ymtotals = collections.defaultdict()
 
-    for line in open(filename, 'r').readlines():
-        values = line.strip().split(',') # create list of values
+    with open(filename, 'r') as fhandle:
+        for line in fhandle:
+            values = line.strip().split(',') # create list of values
 
-        if values[0] == 'owner_login' or values[3] != 'public':
-            continue # these rows ignored
+            if values[0] == 'owner_login' or values[3] != 'public':
+                continue # these rows ignored
 
-        orgname = values[0].lower()
-        year = values[2][:4]
-        month = values[2][5:7]
-        for key in [year + month, year + month + orgname]:
-            if key in ymtotals.keys():
-                ymtotals[key] += 1
-            else:
-                ymtotals[key] = 1
+            orgname = values[0].lower()
+            year = values[2][:4]
+            month = values[2][5:7]
+            for key in [year + month, year + month + orgname]:
+                if key in ymtotals.keys():
+                    ymtotals[key] += 1
+                else:
+                    ymtotals[key] = 1
 
     return ymtotals
 
@@ -52,9 +54,7 @@ def write_ymtotals(ymtotals, filename):
     cumm_az = 0
     cumm_ms = 0
 
-    with open(filename, 'w') as fhandle:
-        fhandle.write('year,month,microsoft,azure,other\n')
-
+    rows = [('year', 'month', 'microsoft', 'azure', 'other')]
     while True:
         yearmonth = currentyear + currentmonth
 
@@ -62,10 +62,8 @@ def write_ymtotals(ymtotals, filename):
         cumm_az += ymtotals.get(yearmonth + 'azure', 0)
         cumm_ms += ymtotals.get(yearmonth + 'microsoft', 0)
         print(currentyear, currentmonth, cumm_tot, cumm_az, cumm_ms)
-        with open(filename, 'a') as fhandle:
-            fhandle.write(currentyear + ',' + currentmonth + ',' + \
-                str(cumm_ms) + ',' + str(cumm_az) + ',' + \
-                str(cumm_tot - cumm_ms - cumm_az) + '\n')
+        rows.append((currentyear, currentmonth, cumm_ms, cumm_az,
+                     cumm_tot - cumm_ms - cumm_az))
         if currentmonth == '12':
             currentyear = str(int(currentyear) + 1).zfill(4)
             currentmonth = '01'
@@ -74,6 +72,9 @@ def write_ymtotals(ymtotals, filename):
         if currentyear > lastyear or (currentyear == lastyear and currentmonth > lastmonth):
             break
 
+    with open(filename, 'w', newline='') as fhandle:
+        csv.writer(fhandle, lineterminator='\n').writerows(rows)
+
 
 #-------------------------------------------------------------------------------
 if __name__ == '__main__':
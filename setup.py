@@ -10,7 +10,8 @@ setup(
     py_modules=['gitdata'],
     install_requires=[
         'Click',
-        'Requests'
+        'Requests',
+        'urllib3'
     ],
     entry_points='''
         [console_scripts]